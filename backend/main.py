@@ -1,15 +1,62 @@
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+import hashlib
+import logging
+import logging.handlers
+import queue
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+import orjson
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Literal, Optional
 import os
 from dotenv import load_dotenv
 
-from services.baserow.client import BaserowClient
+from services.baserow.client import (
+    BaserowClient,
+    RELATIONSHIP_COLUMNS,
+    TABLE_COLUMNS,
+    empty_columns,
+    expand_columns,
+    invalidate_cache,
+)
 
 load_dotenv()
 
-app = FastAPI(title="Baserow ERD API", description="API for Baserow ERD Viewer")
+# Log records are queued on the request path and written by a background thread
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, logging.StreamHandler(), respect_handler_level=True
+)
+logging.basicConfig(
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+)
+# httpx logs every upstream request at INFO; only show those when debugging
+if logging.getLogger().level > logging.DEBUG:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+log = logging.getLogger(__name__)
+
+# Shared Baserow client, reused across requests
+_client: Optional[BaserowClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the log listener and close the shared Baserow client on shutdown."""
+    _log_listener.start()
+    try:
+        yield
+    finally:
+        if _client is not None:
+            await _client.close()
+        _log_listener.stop()
+
+app = FastAPI(
+    title="Baserow ERD API",
+    description="API for Baserow ERD Viewer",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -20,48 +67,93 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_baserow_client():
-    """Dependency to get the Baserow client."""
-    try:
-        return BaserowClient()
-    except ValueError as e:
-        raise HTTPException(status_code=401, detail=str(e))
+async def get_baserow_client():
+    """Dependency to get the shared, authenticated Baserow client."""
+    global _client
+    if _client is None:
+        try:
+            _client = BaserowClient()
+        except ValueError as e:
+            raise HTTPException(status_code=401, detail=str(e))
+    await _client.authenticate()
+    return _client
 
 @app.get("/")
 def read_root():
     """Root endpoint."""
     return {"message": "Welcome to Baserow ERD API"}
 
+@app.post("/api/cache/invalidate")
+def invalidate_baserow_cache():
+    """Drop cached Baserow responses so the next request refetches them."""
+    invalidate_cache()
+    return {"message": "Cache invalidated"}
+
 @app.get("/api/tables")
-def get_all_tables(client: BaserowClient = Depends(get_baserow_client)):
+async def get_all_tables(client: BaserowClient = Depends(get_baserow_client)):
     """Get all tables."""
     try:
-        return client.get_all_tables()
+        return await client.get_all_tables()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether an If-None-Match header matches an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
 @app.get("/api/fields/{table_id}")
-def get_fields(table_id: int, client: BaserowClient = Depends(get_baserow_client)):
-    """Get all fields for a specific table."""
+async def get_fields(table_id: int, request: Request, client: BaserowClient = Depends(get_baserow_client)):
+    """
+    Get all fields for a specific table.
+
+    The response carries an ETag of its body; a request whose If-None-Match
+    matches it gets an empty 304 instead.
+    """
     try:
-        return client.get_fields(table_id)
+        fields = await client.get_fields(table_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    body = orjson.dumps(fields)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=30"}
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/erd")
-async def get_erd_data(client: BaserowClient = Depends(get_baserow_client)):
-    """Get all data needed for creating an ERD."""
+async def get_erd_data(
+    response_format: Literal["soa", "aos"] = Query("soa", alias="format"),
+    client: BaserowClient = Depends(get_baserow_client)
+):
+    """
+    Get all data needed for creating an ERD.
+
+    Tables and relationships are column-oriented by default; pass
+    `format=aos` to get them as lists of objects instead.
+    """
     try:
-        data = client.get_erd_data()
-        if not data or not data.get("tables"):
-            return {
-                "tables": [],
-                "relationships": [],
+        data = await client.get_erd_data()
+        if not data or not data["tables"]["id"]:
+            data = {
+                "tables": empty_columns(TABLE_COLUMNS),
+                "relationships": empty_columns(RELATIONSHIP_COLUMNS),
                 "message": "No tables found in your Baserow databases"
             }
-        return data
+        if response_format == "aos":
+            data = {
+                **data,
+                "tables": expand_columns(data["tables"]),
+                "relationships": expand_columns(data["relationships"])
+            }
+        # Returned directly so orjson serializes the dataclasses itself,
+        # skipping FastAPI's per-object conversion to dicts
+        return ORJSONResponse(data)
     except Exception as e:
-        print(f"Error getting ERD data: {str(e)}")
+        log.error("Error getting ERD data: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching ERD data: {str(e)}"
@@ -69,4 +161,4 @@ async def get_erd_data(client: BaserowClient = Depends(get_baserow_client)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
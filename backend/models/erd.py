@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+
+@dataclass
+class TableInfo:
+    """
+    A table with its fields and the database and workspace it belongs to.
+    """
+    __slots__ = ("id", "name", "database_id", "database_name", "workspace_id", "workspace_name", "fields")
+
+    id: int
+    name: str
+    database_id: int
+    database_name: str
+    workspace_id: int
+    workspace_name: str
+    fields: List[Dict[str, Any]]
+
+
+@dataclass
+class DatabaseInfo:
+    """
+    A database and how many tables it holds.
+    """
+    __slots__ = ("id", "name", "workspace_id", "workspace_name", "has_tables", "table_count")
+
+    id: int
+    name: str
+    workspace_id: int
+    workspace_name: str
+    has_tables: bool
+    table_count: int
@@ -1,38 +1,203 @@
-import requests
-from typing import Dict, List, Any, Optional
+import asyncio
+import base64
+import random
+import httpx
+import ijson
+import logging
+import orjson
+import time
+from cachetools import LRUCache, TTLCache
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 import os
 from dotenv import load_dotenv
-import json
+
+from models.erd import DatabaseInfo, TableInfo
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+# Transient upstream statuses that are retried with exponential backoff
+RETRY_STATUSES = (429, 502, 503, 504)
+# Statuses meaning Baserow is throttling us
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRIES = 5
+RETRY_BACKOFF = 0.3
+RETRY_JITTER = 0.1
+# Longest wait honored between retries; a longer `Retry-After` fails the request
+MAX_RETRY_DELAY = 10.0
+
+# Keys kept from each table and field listing item; everything else is dropped
+TABLE_KEYS = ("id", "name")
+FIELD_KEYS = ("id", "name", "type", "primary", "link_row_table_id", "link_row_table")
+
+def _project(item: Any, keys: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """
+    Keep only `keys` of a JSON object, or return None for non-objects.
+    """
+    try:
+        get = item.get
+    except AttributeError:
+        return None
+    return {key: get(key) for key in keys if key in item}
+
+# Column layout of the ERD tables and relationships, which are built and
+# returned column-oriented: one list per column instead of one dict per row
+TABLE_COLUMNS = ("id", "name", "database_id", "database_name", "workspace_id", "workspace_name", "fields")
+RELATIONSHIP_COLUMNS = (
+    "source_table_id", "source_table_name", "target_table_id",
+    "target_table_name", "field_id", "field_name"
+)
+
+def empty_columns(names: Tuple[str, ...]) -> Dict[str, List[Any]]:
+    """
+    Create an empty column-oriented table with the given column names.
+    """
+    return {name: [] for name in names}
+
+def expand_columns(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn a column-oriented table into a list of row dicts.
+    """
+    names = tuple(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+# Process-wide cache of successful GET responses, shared by all clients
+_cache = TTLCache(maxsize=1024, ttl=int(os.getenv("BASEROW_CACHE_TTL", "300")))
+
+def invalidate_cache() -> None:
+    """
+    Drop every cached Baserow response.
+    """
+    _cache.clear()
+
+# JWT tokens shared by all clients, keyed by account email: (token, expires_at)
+_token_cache: Dict[str, Tuple[str, float]] = {}
+# ERD builds in progress, keyed by account email, joined by concurrent callers
+_inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+# Refresh tokens this many seconds before they expire
+TOKEN_REFRESH_SKEW = 30
+# Assumed token lifetime when the JWT carries no readable `exp` claim
+DEFAULT_TOKEN_TTL = 9 * 60
+
+def _token_expiry(token: str) -> float:
+    """
+    Read the expiry timestamp from a JWT without verifying its signature.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(orjson.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return time.time() + DEFAULT_TOKEN_TTL
+
 class BaserowClient:
     """
-    A client for interacting with the Baserow API using JWT authentication.
+    An async client for interacting with the Baserow API using JWT authentication.
     """
-    
-    def __init__(self, api_url: str = None, email: str = None, password: str = None):
+
+    def __init__(self, api_url: str = None, email: str = None, password: str = None, batch_url: str = None):
         """
         Initialize the Baserow client with JWT authentication.
-        
+
+        The HTTP session and JWT token are created lazily by `authenticate`,
+        so constructing a client never touches the network.
+        A single client is meant to be reused for the lifetime of the app.
+
         Args:
             api_url: The URL of the Baserow API
             email: Baserow account email
             password: Baserow account password
+            batch_url: Optional URL of a batch aggregator that accepts many
+                GETs in one POST and shares Baserow's authentication
         """
         self.api_url = api_url or os.getenv("BASEROW_API_URL", "https://api.baserow.io/api")
         self.email = email or os.getenv("BASEROW_EMAIL")
         self.password = password or os.getenv("BASEROW_PASSWORD")
-        
+        self.batch_url = batch_url or os.getenv("BASEROW_BATCH_URL")
+
         if not all([self.email, self.password]):
             raise ValueError("Baserow email and password are required")
-        
-        tokens = self._get_initial_tokens()
-        self.jwt_token = tokens["token"]
-        self.refresh_token = tokens.get("refresh")
-        print(f"Initialized Baserow client with API URL: {self.api_url}")
-    
-    def _get_initial_tokens(self) -> Dict[str, str]:
+
+        self.jwt_token: Optional[str] = None
+        self._session: Optional[httpx.AsyncClient] = None
+        # Serializes authentication; created on first use so that on Python
+        # 3.8/3.9 it binds to the loop the app actually runs on
+        self._token_lock: Optional[asyncio.Lock] = None
+        # Last ETag and body seen per URL, used to revalidate with If-None-Match
+        self._etags: LRUCache = LRUCache(maxsize=1024)
+        # Bounds the number of requests in flight to Baserow at once
+        self._limit = asyncio.Semaphore(int(os.getenv("BASEROW_CONCURRENCY", "64")))
+
+        # Endpoint URLs, built once and filled in with `%` on the hot paths
+        self._workspaces_url = f"{self.api_url}/workspaces/"
+        self._apps_tmpl = f"{self.api_url}/applications/workspace/%d/"
+        self._app_tmpl = f"{self.api_url}/applications/%d/"
+        self._tables_tmpl = f"{self.api_url}/database/tables/database/%d/"
+        self._alt_tables_tmpl = f"{self.api_url}/database/%d/tables/"
+        self._fields_tmpl = f"{self.api_url}/database/fields/table/%d/"
+        log.debug("Initialized Baserow client with API URL: %s", self.api_url)
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP session, creating it on first use.
+
+        All requests go through this session so keep-alive connections
+        are pooled and the TLS handshake is only paid once per connection.
+        HTTP/2 is negotiated when the server supports it, multiplexing
+        concurrent requests over a single connection; otherwise httpx
+        falls back to pooled HTTP/1.1 connections. Responses are requested
+        Brotli or gzip compressed and decompressed transparently.
+        """
+        if self._session is None or self._session.is_closed:
+            headers = {"Accept-Encoding": "br, gzip"}
+            if self.jwt_token:
+                headers.update(self._get_headers())
+            self._session = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                timeout=30.0,
+                headers=headers
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Close the underlying HTTP session.
+        """
+        if self._session is not None and not self._session.is_closed:
+            await self._session.aclose()
+        self._session = None
+
+    async def authenticate(self, stale_token: Optional[str] = None) -> None:
+        """
+        Make sure the client holds a valid JWT token.
+
+        Tokens are shared between clients through a process-wide cache and
+        only fetched again when missing, about to expire, or equal to
+        `stale_token`. The lock makes concurrent callers wait for a single
+        in-flight authentication instead of each posting their own.
+        """
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            cached = _token_cache.get(self.email)
+            if (
+                cached is None
+                or cached[0] == stale_token
+                or cached[1] - TOKEN_REFRESH_SKEW <= time.time()
+            ):
+                tokens = await self._get_initial_tokens()
+                cached = (tokens["token"], _token_expiry(tokens["token"]))
+                _token_cache[self.email] = cached
+
+        if self.jwt_token != cached[0]:
+            self.jwt_token = cached[0]
+            self.session.headers.update(self._get_headers())
+
+    async def _get_initial_tokens(self) -> Dict[str, str]:
         """
         Get initial JWT token by authenticating with email and password.
         """
@@ -41,31 +206,37 @@ class BaserowClient:
             "email": self.email,
             "password": self.password
         }
-        
+
         try:
-            response = requests.post(auth_url, json=payload)
-            print(f"Auth response status: {response.status_code}")
-            
+            response = await self.session.post(
+                auth_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
+            log.debug("Auth response status: %s", response.status_code)
+
             if response.status_code == 200:
-                token_data = response.json()
+                token_data = orjson.loads(response.content)
                 return {
                     "token": token_data["access_token"]
                 }
             else:
-                print(f"Authentication failed: {response.text}")
+                log.error("Authentication failed: %s", response.text)
                 raise Exception("Failed to get JWT token")
         except Exception as e:
-            print(f"Error during authentication: {str(e)}")
+            log.error("Error during authentication: %s", e)
             raise
 
-    def _refresh_token(self) -> None:
+    async def _refresh_token(self, rejected_token: Optional[str]) -> None:
         """
         Get a new JWT token by re-authenticating.
+
+        `rejected_token` is the token the failed request was sent with. If
+        another task has already replaced it, that newer token is adopted
+        instead of authenticating again.
         """
-        tokens = self._get_initial_tokens()
-        self.jwt_token = tokens["token"]
-        self.refresh_token = tokens["refresh"]
-    
+        await self.authenticate(stale_token=rejected_token)
+
     def _get_headers(self) -> Dict[str, str]:
         """
         Get the headers for API requests, including JWT authentication.
@@ -73,287 +244,600 @@ class BaserowClient:
         return {
             "Authorization": f"JWT {self.jwt_token}"
         }
-    
-    def _handle_auth_error(self, response: requests.Response, retry_func: callable, *args, **kwargs):
+
+    async def _open(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        GET a URL through the pooled session.
+
+        A 401 means the JWT token was rejected: the client re-authenticates
+        once and replays the request. The body of the returned response is
+        left unread; the caller must close it with `aclose()`.
+        """
+        session = self.session
+        reauthenticated = False
+        while True:
+            # Built per attempt so a refreshed Authorization header is picked up
+            request = session.build_request("GET", url, headers=headers)
+            authorization = request.headers.get("Authorization", "")
+            sent_token = authorization[4:] if authorization.startswith("JWT ") else None
+            response = await session.send(request, stream=True)
+            log.debug("GET %s: %s %s (Content-Encoding: %s)", url, response.http_version,
+                      response.status_code, response.headers.get("Content-Encoding", "identity"))
+            if response.status_code == 401 and not reauthenticated:
+                await response.aclose()
+                log.info("JWT token rejected. Re-authenticating...")
+                await self._refresh_token(sent_token)
+                reauthenticated = True
+                continue
+            return response
+
+    @staticmethod
+    def _retry_delay(response: Optional[httpx.Response], attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a transient error, or None to give up.
+
+        Honors a numeric `Retry-After` header up to `MAX_RETRY_DELAY`,
+        otherwise backs off exponentially with a little jitter so retries
+        do not line up. `response` is None when the connection failed.
+        """
+        try:
+            delay = float(response.headers["Retry-After"])
+        except (AttributeError, KeyError, ValueError):
+            delay = RETRY_BACKOFF * (2 ** attempt) + random.uniform(0, RETRY_JITTER)
+        return delay if delay <= MAX_RETRY_DELAY else None
+
+    @asynccontextmanager
+    async def _stream(self, url: str, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[httpx.Response]:
         """
-        Handle 401 authentication errors by refreshing token and retrying.
+        Open a streamed GET while holding one of the concurrency slots,
+        retrying transient errors.
+
+        Both the statuses in `RETRY_STATUSES` and transport failures (a
+        dropped HTTP/2 connection fails every stream multiplexed on it) are
+        retried, sharing the `MAX_RETRIES` budget.
+
+        The slot is held until the body has been consumed and the response
+        closed, so `BASEROW_CONCURRENCY` bounds the requests really in
+        flight rather than just the ones waiting for headers. It is released
+        while backing off, so throttled retries do not starve other requests.
         """
-        if response.status_code == 401:
-            print("JWT token expired. Refreshing token...")
-            self._refresh_token()
-            return retry_func(*args, **kwargs)
+        attempt = 0
+        while True:
+            async with self._limit:
+                try:
+                    response = await self._open(url, headers)
+                except httpx.TransportError as e:
+                    delay = self._retry_delay(None, attempt) if attempt < MAX_RETRIES else None
+                    if delay is None:
+                        raise
+                    log.warning("GET %s failed (%r); retrying in %.2fs", url, e, delay)
+                else:
+                    delay = None
+                    if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = self._retry_delay(response, attempt)
+                    if delay is None:
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    await response.aclose()
+                    if response.status_code in THROTTLE_STATUSES:
+                        log.warning("Throttled by Baserow (%s) on %s; retrying in %.2fs",
+                                    response.status_code, url, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        GET a URL and read its whole body.
+
+        The body is read before the connection is released back to the
+        pool, so `content` and `text` are available on the result.
+        """
+        async with self._stream(url, headers) as response:
+            await response.aread()
         return response
-    
-    def get_all_databases(self) -> List[Dict[str, Any]]:
+
+    @staticmethod
+    def _if_none_match(validator: Optional[Tuple[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        Get the conditional request headers for a remembered ETag, if any.
+        """
+        if validator is None:
+            return None
+        return {"If-None-Match": validator[0]}
+
+    def _remember_etag(self, url: str, response: httpx.Response, value: Any) -> None:
+        """
+        Remember the response's ETag together with its decoded body.
+        """
+        etag = response.headers.get("ETag")
+        if etag:
+            self._etags[url] = (etag, value)
+
+    async def _get_json(self, url: str) -> Any:
+        """
+        GET a URL and return its decoded JSON body, raising on HTTP errors.
+
+        If Baserow sent an ETag for this URL before, the request is made
+        conditional and a 304 reuses the previously decoded body.
+        """
+        validator = self._etags.get(url)
+        response = await self._get(url, self._if_none_match(validator))
+        if response.status_code == 304 and validator is not None:
+            return validator[1]
+        response.raise_for_status()
+        value = orjson.loads(response.content)
+        self._remember_etag(url, response, value)
+        return value
+
+    async def _get_items(self, url: str, keys: Tuple[str, ...]) -> List[Any]:
+        """
+        GET a URL returning a JSON array and stream-parse it item by item.
+
+        Each item is projected down to `keys` as soon as it is parsed, so
+        the full response document is never held in memory. Items that are
+        not JSON objects are dropped. Requests are revalidated with ETags
+        like in `_get_json`.
+        """
+        validator = self._etags.get(url)
+        async with self._stream(url, self._if_none_match(validator)) as response:
+            if response.status_code == 304 and validator is not None:
+                return validator[1]
+            response.raise_for_status()
+            items = []
+            parsed = ijson.sendable_list()
+            parser = ijson.items_coro(parsed, "item", use_float=True)
+
+            def drain() -> None:
+                for item in parsed:
+                    projected = _project(item, keys)
+                    if projected is not None:
+                        items.append(projected)
+                del parsed[:]
+
+            # Feed the parser chunk by chunk, projecting items as they complete
+            async for chunk in response.aiter_bytes():
+                parser.send(chunk)
+                drain()
+            parser.close()
+            drain()
+        self._remember_etag(url, response, items)
+        return items
+
+    async def _cached_get(self, url: str, keys: Optional[Tuple[str, ...]] = None) -> Any:
+        """
+        Like `_get_json`, but served from the process-wide TTL cache when possible.
+
+        When `keys` is given the response must be a JSON array, which is
+        streamed and projected with `_get_items`. Entries are keyed by
+        account and URL, and only successful responses are stored.
+        """
+        key = (self.email, url)
+        value = _cache.get(key)
+        if value is not None:
+            return value
+        if keys is None:
+            value = await self._get_json(url)
+        else:
+            value = await self._get_items(url, keys)
+        _cache[key] = value
+        return value
+
+    async def _post_batch(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Send GETs for `urls` to the batch aggregator in a single POST.
+
+        The aggregator answers with one `{"status": ..., "body": ...}`
+        entry per request, in request order.
+        """
+        payload = {"requests": [{"method": "GET", "url": url} for url in urls]}
+        async with self._limit:
+            response = await self.session.post(
+                self.batch_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
+        response.raise_for_status()
+        entries = orjson.loads(response.content)
+        if not isinstance(entries, list) or len(entries) != len(urls):
+            raise ValueError(f"Expected a list of {len(urls)} batch responses")
+        if not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError("Batch responses must be objects")
+        return entries
+
+    async def _batch_get(self, urls: List[str], keys: Optional[Tuple[str, ...]] = None) -> List[Any]:
+        """
+        GET many URLs at once, returning bodies or exceptions in URL order.
+
+        Cached responses are served directly. The remaining URLs go to the
+        batch aggregator as one request when one is configured; otherwise,
+        or if the aggregator fails, they are fetched concurrently. `keys`
+        projects array responses like `_cached_get` does.
+        """
+        results: List[Any] = [None] * len(urls)
+        missing = []
+        for index, url in enumerate(urls):
+            value = _cache.get((self.email, url))
+            if value is None:
+                missing.append(index)
+            else:
+                results[index] = value
+        if not missing:
+            return results
+
+        if self.batch_url:
+            try:
+                entries = await self._post_batch([urls[index] for index in missing])
+            except Exception as e:
+                log.warning("Batch request failed, falling back to individual requests: %s", e)
+            else:
+                for index, entry in zip(missing, entries):
+                    url = urls[index]
+                    status = entry.get("status")
+                    if not isinstance(status, int) or not 200 <= status < 300:
+                        results[index] = Exception(f"Batched GET {url} failed with status {status}")
+                        continue
+                    value = entry.get("body")
+                    if keys is not None:
+                        if not isinstance(value, list):
+                            results[index] = Exception(f"Batched GET {url} returned a non-list body")
+                            continue
+                        value = [
+                            projected for item in value
+                            if (projected := _project(item, keys)) is not None
+                        ]
+                    _cache[(self.email, url)] = value
+                    results[index] = value
+                return results
+
+        fetched = await asyncio.gather(
+            *(self._cached_get(urls[index], keys) for index in missing), return_exceptions=True
+        )
+        for index, value in zip(missing, fetched):
+            results[index] = value
+        return results
+
+    async def _get_workspaces(self) -> List[Dict[str, Any]]:
+        """
+        Get all workspaces visible to the authenticated user.
+        """
+        workspaces_url = self._workspaces_url
+        log.debug("Fetching workspaces from: %s", workspaces_url)
+        workspaces = await self._cached_get(workspaces_url)
+        log.debug("Found %d workspaces", len(workspaces))
+        return workspaces
+
+    async def _fetch_workspace_dbs(self, workspace: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the database applications of a single workspace.
+        """
+        workspace_id = workspace["id"]
+        databases_url = self._apps_tmpl % int(workspace_id)
+        log.debug("Fetching databases for workspace %s", workspace_id)
+        databases = await self._cached_get(databases_url)
+
+        # Filter database type applications; this is the only place it happens
+        return [db for db in databases if isinstance(db, dict) and db.get("type") == "database"]
+
+    async def _fetch_fields(self, tables: List[Any]) -> List[Tuple[Dict[str, Any], List[Any]]]:
+        """
+        Get the fields of many tables with one batch of requests (see `_batch_get`).
+
+        Returns `(table, fields)` pairs in table order; tables that are
+        malformed or whose fields could not be fetched are left out.
+        """
+        fields_tmpl = self._fields_tmpl
+        valid_tables = []
+        field_urls = []
+        for table in tables:
+            try:
+                field_urls.append(fields_tmpl % int(table["id"]))
+            except Exception as e:
+                log.warning("Skipping table %r: %s", table, e)
+                continue
+            valid_tables.append(table)
+
+        field_results = await self._batch_get(field_urls, FIELD_KEYS)
+
+        pairs = []
+        for table, fields in zip(valid_tables, field_results):
+            if isinstance(fields, Exception):
+                log.warning("Error processing table %s: %s", table.get("id", "unknown"), fields)
+                continue
+            pairs.append((table, fields))
+        return pairs
+
+    async def get_all_databases(self) -> List[Dict[str, Any]]:
         """
         Get all databases from all workspaces.
         """
         try:
-            # Get workspaces
-            workspaces_url = f"{self.api_url}/workspaces/"
-            print(f"Fetching workspaces from: {workspaces_url}")
-            response = requests.get(workspaces_url, headers=self._get_headers())
-            response.raise_for_status()
-            workspaces = response.json()
-            print(f"Found {len(workspaces)} workspaces")
+            workspaces = await self._get_workspaces()
+
+            # Get databases for each workspace concurrently
+            db_tasks = [self._fetch_workspace_dbs(ws) for ws in workspaces]
+            results = await asyncio.gather(*db_tasks, return_exceptions=True)
 
             all_databases = []
-            # Get databases for each workspace
-            for workspace in workspaces:
-                try:
-                    workspace_id = workspace["id"]
-                    databases_url = f"{self.api_url}/applications/workspace/{workspace_id}/"
-                    print(f"Fetching databases for workspace {workspace_id}")
-                    
-                    databases_response = requests.get(databases_url, headers=self._get_headers())
-                    databases_response.raise_for_status()
-                    databases = databases_response.json()
-                    
-                    # Filter database type applications
-                    for db in databases:
-                        if isinstance(db, dict) and db.get("type") == "database":
-                            print(f"Found database: {db.get('name', 'Unnamed')} (ID: {db.get('id')})")
-                            all_databases.append(db)
-                except Exception as e:
-                    print(f"Error processing workspace {workspace_id}: {str(e)}")
+            for workspace, databases in zip(workspaces, results):
+                if isinstance(databases, Exception):
+                    log.warning("Error processing workspace %s: %s", workspace.get("id", "unknown"), databases)
                     continue
+                for db in databases:
+                    log.debug("Found database: %s (ID: %s)", db.get("name", "Unnamed"), db.get("id"))
+                    all_databases.append(db)
 
-            print(f"Total databases found: {len(all_databases)}")
+            log.debug("Total databases found: %d", len(all_databases))
             return all_databases
         except Exception as e:
-            print(f"Error in get_all_databases: {str(e)}")
+            log.error("Error in get_all_databases: %s", e)
             raise
-    
-    def get_database_schema(self, database_id: int, workspace_id: int, workspace_name: str) -> Optional[Dict[str, Any]]:
+
+    async def get_all_tables(self) -> List[Dict[str, Any]]:
+        """
+        Get all tables from all databases.
+        """
+        databases = await self.get_all_databases()
+        all_tables = []
+        for database in databases:
+            for table in database.get("tables", []):
+                if isinstance(table, dict):
+                    all_tables.append(table)
+        return all_tables
+
+    async def get_fields(self, table_id: int) -> List[Dict[str, Any]]:
+        """
+        Get all fields for a specific table.
+        """
+        fields_url = self._fields_tmpl % int(table_id)
+        return await self._cached_get(fields_url, FIELD_KEYS)
+
+    async def get_database_schema(self, database_id: int, workspace_id: int, workspace_name: str) -> Optional[Dict[str, Any]]:
         """
         Get schema (tables and fields) for a specific database.
         """
         try:
-            print(f"Getting schema for database {database_id}")
-            tables_url = f"{self.api_url}/database/tables/database/{database_id}/"
-            print(f"Tables URL: {tables_url}")
-            
-            response = requests.get(tables_url, headers=self._get_headers())
-            print(f"Tables response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"Error response: {response.text}")
+            log.debug("Getting schema for database %s", database_id)
+            tables_url = self._tables_tmpl % int(database_id)
+            log.debug("Tables URL: %s", tables_url)
+
+            try:
+                tables = await self._cached_get(tables_url, TABLE_KEYS)
+            except httpx.HTTPStatusError as e:
+                log.warning("Error response: %s %s", e.response.status_code, e.response.reason_phrase)
                 return {"tables": []}
-            
-            response.raise_for_status()
-            tables = response.json()
-            print(f"Found {len(tables)} tables in database {database_id}")
+            log.debug("Found %d tables in database %s", len(tables), database_id)
 
             # Get database details to get the proper name
-            database_url = f"{self.api_url}/applications/{database_id}/"
+            database_url = self._app_tmpl % int(database_id)
             try:
-                db_response = requests.get(database_url, headers=self._get_headers())
-                db_response.raise_for_status()
-                database_details = db_response.json()
+                database_details = await self._cached_get(database_url)
                 database_name = database_details.get("name", f"Database {database_id}")
-                print(f"Database name: {database_name}")
+                log.debug("Database name: %s", database_name)
             except Exception as e:
-                print(f"Error getting database details: {str(e)}")
+                log.warning("Error getting database details: %s", e)
                 database_name = f"Database {database_id}"
 
             schema = {"tables": []}
-            for table in tables:
-                try:
-                    if not isinstance(table, dict):
-                        print(f"Skipping table: not a dictionary: {table}")
-                        continue
-                    
-                    table_id = int(table["id"])
-                    print(f"Processing table {table_id}")
-                    fields_url = f"{self.api_url}/database/fields/table/{table_id}/"
-                    fields_response = requests.get(fields_url, headers=self._get_headers())
-                    fields_response.raise_for_status()
-                    fields = fields_response.json()
-                    
-                    # Process fields to ensure they're all dictionaries
-                    processed_fields = []
-                    for field in fields:
-                        if isinstance(field, dict):
-                            processed_fields.append(field)
-                        else:
-                            print(f"Skipping field: not a dictionary: {field}")
-                    
-                    table_info = {
-                        "id": table_id,
-                        "name": table["name"],
-                        "database_id": int(database_id),
-                        "database_name": database_name,
-                        "workspace_id": int(workspace_id),
-                        "workspace_name": workspace_name,
-                        "fields": processed_fields
-                    }
-                    schema["tables"].append(table_info)
-                except Exception as e:
-                    print(f"Error processing table {table.get('id', 'unknown') if isinstance(table, dict) else table}: {str(e)}")
-                    continue
+            for table, fields in await self._fetch_fields(tables):
+                table_info = TableInfo(
+                    id=int(table["id"]),
+                    name=table["name"],
+                    database_id=int(database_id),
+                    database_name=database_name,
+                    workspace_id=int(workspace_id),
+                    workspace_name=workspace_name,
+                    fields=fields
+                )
+                schema["tables"].append(table_info)
 
             return schema
         except Exception as e:
-            print(f"Error in get_database_schema: {str(e)}")
+            log.error("Error in get_database_schema: %s", e)
             return {"tables": []}
-    
-    def get_erd_data(self) -> Dict[str, Any]:
+
+    async def _fetch_database_tables(self, database_id: int) -> List[Dict[str, Any]]:
+        """
+        Get the tables of a database, falling back to the alternative endpoint.
+
+        The fallback is only tried when the standard endpoint does not exist
+        (404/405); a permission error means the tables are not visible at all.
+        """
+        # First, try the standard tables endpoint
+        tables_url = self._tables_tmpl % database_id
+        log.debug("Trying tables URL: %s", tables_url)
+        try:
+            return await self._cached_get(tables_url, TABLE_KEYS)
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            log.debug("Error response from tables endpoint: %s %s", status, e.response.reason_phrase)
+            if status in (401, 403):
+                return []
+            if status not in (404, 405):
+                raise
+
+        # Try alternative endpoint for database tables
+        tables_url = self._alt_tables_tmpl % database_id
+        log.debug("Trying alternative tables URL: %s", tables_url)
+        return await self._cached_get(tables_url, TABLE_KEYS)
+
+    @staticmethod
+    def _extract_relationship(field: Dict[str, Any], table_id: int, table_name: str) -> Optional[Tuple[Any, ...]]:
+        """
+        Build the relationship described by a link_row field.
+
+        Returns a row ordered like `RELATIONSHIP_COLUMNS`, or None for any
+        other field type or when the field lacks the ids needed to describe
+        the relationship.
+        """
+        fg = field.get
+        if fg("type") != "link_row":
+            return None
+
+        link_row_table_id = fg("link_row_table_id")
+        field_id = fg("id")
+        if link_row_table_id is None or field_id is None:
+            return None
+
+        try:
+            target_table_name = fg("link_row_table").get("name", "Unknown")
+        except AttributeError:
+            target_table_name = "Unknown"
+
+        try:
+            return (
+                table_id,
+                table_name,
+                int(link_row_table_id),
+                target_table_name,
+                int(field_id),
+                fg("name", "Unknown Field")
+            )
+        except (ValueError, TypeError) as e:
+            log.warning("Error creating relationship for field: %s", e)
+            return None
+
+    async def _fetch_database(self, workspace_id: int, workspace_name: str, database: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get tables, fields and relationships for a single database.
+        """
+        database_id = int(database["id"])
+        database_name = database["name"]
+        database_tables = empty_columns(TABLE_COLUMNS)
+        relationships = empty_columns(RELATIONSHIP_COLUMNS)
+        relationship_columns = tuple(relationships.values())
+
+        log.debug("Processing database: %s (ID: %s)", database_name, database_id)
+
+        try:
+            if database.get("tables") == []:
+                # The application listing already shows the database is empty
+                tables = []
+            else:
+                tables = await self._fetch_database_tables(database_id)
+            table_count = len(tables)
+            log.debug("Found %d tables in database %s", table_count, database_id)
+        except Exception as e:
+            log.warning("Error fetching tables for database %s: %s", database_id, e)
+            # Still add the database to the list, but mark it as having no tables
+            tables = []
+            table_count = 0
+
+        # Fetch the fields of every table concurrently
+        for table, fields in await self._fetch_fields(tables):
+            table_id = int(table["id"])
+            table_name = table["name"]
+            database_tables["id"].append(table_id)
+            database_tables["name"].append(table_name)
+            database_tables["database_id"].append(database_id)
+            database_tables["database_name"].append(database_name)
+            database_tables["workspace_id"].append(workspace_id)
+            database_tables["workspace_name"].append(workspace_name)
+            database_tables["fields"].append(fields)
+
+            # Process relationships
+            for field in fields:
+                relationship = self._extract_relationship(field, table_id, table_name)
+                if relationship is not None:
+                    for column, value in zip(relationship_columns, relationship):
+                        column.append(value)
+
+        return {
+            "tables": database_tables,
+            "relationships": relationships,
+            "database": DatabaseInfo(
+                id=database_id,
+                name=database_name,
+                workspace_id=workspace_id,
+                workspace_name=workspace_name,
+                has_tables=table_count > 0,
+                table_count=table_count
+            )
+        }
+
+    async def get_erd_data(self) -> Dict[str, Any]:
         """
         Get all data needed for creating an ERD.
+
+        Concurrent calls for the same account share a single build: callers
+        arriving while one is in flight wait for its result instead of
+        starting another full fan-out. See `_build_erd` for the result.
+        """
+        key = self.email
+        task = _inflight.get(key)
+        if task is None:
+            # The build runs in its own task so no single caller owns it
+            task = asyncio.ensure_future(self._build_erd())
+            _inflight[key] = task
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        else:
+            log.debug("Joining in-flight ERD build")
+        # Shielded so a cancelled caller neither cancels the shared build
+        # nor fails the other callers waiting on it
+        return await asyncio.shield(task)
+
+    async def _build_erd(self) -> Dict[str, Any]:
+        """
+        Collect all data needed for creating an ERD.
+
+        Workspaces, databases and tables are fetched concurrently, so the
+        total latency grows with the depth of the hierarchy rather than
+        with the number of tables. Tables and relationships are returned
+        column-oriented (see `TABLE_COLUMNS` and `RELATIONSHIP_COLUMNS`);
+        use `expand_columns` to get one dict per row.
         """
         try:
-            print("Starting ERD data collection")
-            workspaces_url = f"{self.api_url}/workspaces/"
-            print(f"Fetching workspaces from: {workspaces_url}")
-            workspaces_response = requests.get(workspaces_url, headers=self._get_headers())
-            workspaces_response.raise_for_status()
-            workspaces = workspaces_response.json()
-            print(f"Found {len(workspaces)} workspaces")
-
-            all_tables = []
-            all_relationships = []
+            log.debug("Starting ERD data collection")
+            workspaces = await self._get_workspaces()
+
+            all_tables = empty_columns(TABLE_COLUMNS)
+            all_relationships = empty_columns(RELATIONSHIP_COLUMNS)
             all_databases = []
 
-            for workspace in workspaces:
+            # Get databases for every workspace concurrently
+            db_tasks = [self._fetch_workspace_dbs(ws) for ws in workspaces]
+            workspace_dbs = await asyncio.gather(*db_tasks, return_exceptions=True)
+
+            database_tasks = []
+            for workspace, databases in zip(workspaces, workspace_dbs):
+                if isinstance(databases, Exception):
+                    log.warning("Error processing workspace %s: %s", workspace.get("id", "unknown"), databases)
+                    continue
                 try:
                     workspace_id = int(workspace["id"])
                     workspace_name = workspace["name"]
-                    print(f"\nProcessing workspace: {workspace_name} (ID: {workspace_id})")
-
-                    # Get databases for this workspace
-                    databases_url = f"{self.api_url}/applications/workspace/{workspace_id}/"
-                    databases_response = requests.get(databases_url, headers=self._get_headers())
-                    databases_response.raise_for_status()
-                    databases = databases_response.json()
-
-                    # Filter database type applications
-                    databases = [db for db in databases if isinstance(db, dict) and db.get("type") == "database"]
-                    print(f"Found {len(databases)} databases in workspace {workspace_name}")
-
-                    # Add all databases to the list, even if they have no tables
-                    for database in databases:
-                        try:
-                            database_id = int(database["id"])
-                            database_name = database["name"]
-                            
-                            print(f"\nProcessing database: {database_name} (ID: {database_id})")
-                            
-                            # Try to get tables for this database
-                            try:
-                                # First, try the standard tables endpoint
-                                tables_url = f"{self.api_url}/database/tables/database/{database_id}/"
-                                print(f"Trying tables URL: {tables_url}")
-                                tables_response = requests.get(tables_url, headers=self._get_headers())
-                                
-                                if tables_response.status_code != 200:
-                                    print(f"Error response from tables endpoint: {tables_response.text}")
-                                    # Try alternative endpoint for database tables
-                                    tables_url = f"{self.api_url}/database/{database_id}/tables/"
-                                    print(f"Trying alternative tables URL: {tables_url}")
-                                    tables_response = requests.get(tables_url, headers=self._get_headers())
-                                
-                                tables_response.raise_for_status()
-                                tables = tables_response.json()
-                                table_count = len(tables)
-                                print(f"Found {table_count} tables in database {database_id}")
-                                
-                                # Process each table
-                                database_tables = []
-                                for table in tables:
-                                    try:
-                                        table_id = int(table["id"])
-                                        print(f"Processing table {table_id}")
-                                        fields_url = f"{self.api_url}/database/fields/table/{table_id}/"
-                                        fields_response = requests.get(fields_url, headers=self._get_headers())
-                                        fields_response.raise_for_status()
-                                        fields = fields_response.json()
-                                        
-                                        table_info = {
-                                            "id": table_id,
-                                            "name": table["name"],
-                                            "database_id": database_id,
-                                            "database_name": database_name,
-                                            "workspace_id": workspace_id,
-                                            "workspace_name": workspace_name,
-                                            "fields": fields
-                                        }
-                                        database_tables.append(table_info)
-                                        
-                                        # Process relationships
-                                        for field in fields:
-                                            if isinstance(field, dict) and field.get("type") == "link_row":
-                                                try:
-                                                    # Ensure we have all required fields and they're the right type
-                                                    link_row_table_id = field.get("link_row_table_id")
-                                                    if link_row_table_id is None:
-                                                        continue
-                                                        
-                                                    link_row_table = field.get("link_row_table", {})
-                                                    target_table_name = "Unknown"
-                                                    if isinstance(link_row_table, dict):
-                                                        target_table_name = link_row_table.get("name", "Unknown")
-                                                    
-                                                    field_id = field.get("id")
-                                                    if field_id is None:
-                                                        continue
-                                                        
-                                                    field_name = field.get("name", "Unknown Field")
-                                                    
-                                                    relationship = {
-                                                        "source_table_id": table_id,
-                                                        "source_table_name": table["name"],
-                                                        "target_table_id": int(link_row_table_id),
-                                                        "target_table_name": target_table_name,
-                                                        "field_id": int(field_id),
-                                                        "field_name": field_name
-                                                    }
-                                                    all_relationships.append(relationship)
-                                                except (ValueError, TypeError) as e:
-                                                    print(f"Error creating relationship for field: {str(e)}")
-                                                    continue
-                                    except Exception as e:
-                                        print(f"Error processing table {table.get('id', 'unknown')}: {str(e)}")
-                                        continue
-                                
-                                # Add tables to the global list
-                                all_tables.extend(database_tables)
-                                
-                                # Add database to the list
-                                all_databases.append({
-                                    "id": database_id,
-                                    "name": database_name,
-                                    "workspace_id": workspace_id,
-                                    "workspace_name": workspace_name,
-                                    "has_tables": table_count > 0,
-                                    "table_count": table_count
-                                })
-                                
-                            except Exception as e:
-                                print(f"Error fetching tables for database {database_id}: {str(e)}")
-                                # Still add the database to the list, but mark it as having no tables
-                                all_databases.append({
-                                    "id": database_id,
-                                    "name": database_name,
-                                    "workspace_id": workspace_id,
-                                    "workspace_name": workspace_name,
-                                    "has_tables": False,
-                                    "table_count": 0
-                                })
-                                
-                        except Exception as e:
-                            print(f"Error processing database {database.get('id', 'unknown')}: {str(e)}")
-                            continue
                 except Exception as e:
-                    print(f"Error processing workspace {workspace.get('id', 'unknown')}: {str(e)}")
+                    log.warning("Error processing workspace %s: %s", workspace.get("id", "unknown"), e)
                     continue
+                log.debug("Found %d databases in workspace %s", len(databases), workspace_name)
+                for database in databases:
+                    database_tasks.append(self._fetch_database(workspace_id, workspace_name, database))
+
+            # Process every database concurrently
+            results = await asyncio.gather(*database_tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    log.warning("Error processing database: %s", result)
+                    continue
+                for name, column in result["tables"].items():
+                    all_tables[name].extend(column)
+                for name, column in result["relationships"].items():
+                    all_relationships[name].extend(column)
+                all_databases.append(result["database"])
+
+            if log.isEnabledFor(logging.INFO):
+                log.info(
+                    "Finished collecting ERD data: %d workspaces, %d databases "
+                    "(%d with tables), %d tables, %d relationships",
+                    len(workspaces),
+                    len(all_databases),
+                    sum(1 for db in all_databases if db.has_tables),
+                    len(all_tables["id"]),
+                    len(all_relationships["field_id"]),
+                )
 
-            print(f"\nFinished collecting ERD data:")
-            print(f"- Total workspaces: {len(workspaces)}")
-            print(f"- Total databases: {len(all_databases)}")
-            print(f"- Databases with tables: {sum(1 for db in all_databases if db.get('has_tables', False))}")
-            print(f"- Total tables: {len(all_tables)}")
-            print(f"- Total relationships: {len(all_relationships)}")
-            
             return {
                 "tables": all_tables,
                 "relationships": all_relationships,
@@ -361,5 +845,5 @@ class BaserowClient:
                 "workspaces": workspaces
             }
         except Exception as e:
-            print(f"Error in get_erd_data: {str(e)}")
+            log.error("Error in get_erd_data: %s", e)
             raise
@@ -44,6 +44,19 @@ interface ERDData {
   }>;
 }
 
+// The API sends tables and relationships column-oriented; expand them into rows
+function expandColumns<T>(columns: { [K in keyof T]: T[K][] }): T[] {
+  const keys = Object.keys(columns) as (keyof T)[];
+  const length = keys.length > 0 ? columns[keys[0]].length : 0;
+  return Array.from({ length }, (_, index) => {
+    const row = {} as T;
+    for (const key of keys) {
+      row[key] = columns[key][index];
+    }
+    return row;
+  });
+}
+
 export default function Home() {
   const [erdData, setErdData] = useState<ERDData | null>(null);
   const [error, setError] = useState<string | null>(null);
@@ -65,7 +78,11 @@ export default function Home() {
         
         const data = await response.json();
         console.log('Received data:', data);
-        setErdData(data);
+        setErdData({
+          ...data,
+          tables: expandColumns<ERDData['tables'][number]>(data.tables),
+          relationships: expandColumns<ERDData['relationships'][number]>(data.relationships),
+        });
         setError(null);
       } catch (e) {
         console.error('Fetch error:', e);
@@ -37,7 +37,7 @@ export default function ERDPage() {
       setError(null);
       
       try {
-        const response = await fetch('/api/erd');
+        const response = await fetch('/api/erd?format=aos');
         
         if (!response.ok) {
           throw new Error(`Error fetching ERD data: ${response.status}`);